@@ -16,14 +16,21 @@ Output:
 - printed frequency tables
 """
 
-import csv
 import json
 from collections import Counter
 from pathlib import Path
 
+import pandas as pd
+
+try:
+    import orjson
+except ImportError:  # stdlib json fallback below
+    orjson = None
+
 
 ROOT = Path(__file__).resolve().parents[1]
 TOKENS = ROOT / "results" / "tokens.csv"
+TOKENS_PARQUET = ROOT / "results" / "tokens.parquet"
 
 TRANS = ROOT / "lexicons" / "transgression.json"
 PUN = ROOT / "lexicons" / "punishment.json"
@@ -31,40 +38,63 @@ FRAME = ROOT / "lexicons" / "moral_framing.json"
 
 
 def load_lexicon(path, key):
-    data = json.loads(path.read_text(encoding="utf-8"))
-    return set(data[key])
+    if orjson is not None:
+        data = orjson.loads(path.read_bytes())
+    else:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    return frozenset(data[key])
+
+
+def load_tokens() -> pd.DataFrame:
+    """
+    Prefers the columnar tokens.parquet mirror (typed, compressed) and
+    falls back to parsing tokens.csv. Guarantees a lemma_lower column,
+    using the one precomputed by 01_preprocess.py when present.
+    """
+    if TOKENS_PARQUET.exists():
+        import pyarrow.parquet as pq
+
+        names = pq.ParquetFile(TOKENS_PARQUET).schema_arrow.names
+        lemma_col = "lemma_lower" if "lemma_lower" in names else "lemma"
+        df = pd.read_parquet(TOKENS_PARQUET, columns=[lemma_col, "pos"])
+    else:
+        with TOKENS.open(encoding="utf-8") as f:
+            header = f.readline().rstrip("\r\n").split(",")
+        lemma_col = "lemma_lower" if "lemma_lower" in header else "lemma"
+        df = pd.read_csv(
+            TOKENS,
+            usecols=[lemma_col, "pos"],
+            dtype="string",
+            engine="c",
+            na_filter=False,
+        )
+
+    if lemma_col == "lemma":
+        # older tokens files: lowercase once here
+        df["lemma_lower"] = df["lemma"].str.lower()
+    return df
 
 
 def main():
-    if not TOKENS.exists():
+    if not TOKENS.exists() and not TOKENS_PARQUET.exists():
         raise FileNotFoundError("Missing results/tokens.csv")
 
     trans_verbs = load_lexicon(TRANS, "verbs")
     pun_verbs = load_lexicon(PUN, "verbs")
     framing_cues = load_lexicon(FRAME, "cues")
 
-    trans_counts = Counter()
-    pun_counts = Counter()
-    framing_counts = Counter()
-
-    with TOKENS.open(encoding="utf-8") as f:
-        for row in csv.DictReader(f):
-            lemma = (row["lemma"] or "").lower()
-            pos = row["pos"]
-
-            if not lemma:
-                continue
+    # Vectorized scan: pandas' C parser + hashed isin instead of a
+    # per-row Python loop over csv.DictReader.
+    df = load_tokens()
+    lemmas = df["lemma_lower"]
+    verb_mask = df["pos"].eq("VERB")
 
-            # transgression & punishment = verbs only
-            if pos == "VERB":
-                if lemma in trans_verbs:
-                    trans_counts[lemma] += 1
-                if lemma in pun_verbs:
-                    pun_counts[lemma] += 1
+    # transgression & punishment = verbs only
+    trans_counts = Counter(lemmas[verb_mask & lemmas.isin(trans_verbs)].value_counts().to_dict())
+    pun_counts = Counter(lemmas[verb_mask & lemmas.isin(pun_verbs)].value_counts().to_dict())
 
-            # moral framing = any POS
-            if lemma in framing_cues:
-                framing_counts[lemma] += 1
+    # moral framing = any POS
+    framing_counts = Counter(lemmas[lemmas.isin(framing_cues)].value_counts().to_dict())
 
     print("\n=== Transgression verbs ===")
     for lemma, count in trans_counts.most_common():
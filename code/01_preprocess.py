@@ -20,14 +20,25 @@ import os
 from pathlib import Path
 import sys
 
+import numpy as np
+import pandas as pd
 import spacy
+from spacy.attrs import DEP, HEAD, IS_ALPHA, IS_STOP, LEMMA, ORTH, POS, TAG
 
 
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
 DATA_PATH = PROJECT_ROOT / "data" / "grimms.txt"
 RESULTS_DIR = PROJECT_ROOT / "results"
 SENTENCES_OUT = RESULTS_DIR / "sentences.csv"
+SENTENCES_PARQUET = RESULTS_DIR / "sentences.parquet"
 TOKENS_OUT = RESULTS_DIR / "tokens.csv"
+TOKENS_PARQUET = RESULTS_DIR / "tokens.parquet"
+TOKENS_CONTENT_OUT = RESULTS_DIR / "tokens_content.csv"
+TOKENS_CONTENT_PARQUET = RESULTS_DIR / "tokens_content.parquet"
+
+# The lexicon matching in 02_detect_lexicon_hits.py only ever looks at
+# these POS; a pre-filtered copy halves what it has to read.
+CONTENT_POS = frozenset({"VERB", "NOUN", "PROPN", "ADJ", "ADV"})
 
 
 def ensure_results_dir() -> None:
@@ -49,7 +60,9 @@ def load_spacy_model() -> spacy.language.Language:
     """
     model_name = "en_core_web_sm"
     try:
-        return spacy.load(model_name)
+        # NER is never used downstream; excluding it at load time skips
+        # both loading its weights and running it.
+        return spacy.load(model_name, exclude=["ner"])
     except OSError as e:
         msg = (
             f"spaCy model '{model_name}' is not installed.\n\n"
@@ -61,73 +74,151 @@ def load_spacy_model() -> spacy.language.Language:
         raise RuntimeError(msg) from e
 
 
-def write_sentences(doc: spacy.tokens.Doc) -> list[tuple[int, str]]:
+def iter_chunks(text: str, size: int = 100_000):
     """
-    Returns a list of (sentence_id, sentence_text) and writes to CSV.
+    Yields ~size-character blocks of text, split on paragraph breaks,
+    so spaCy can process the corpus in parallel batches.
     """
-    sentences: list[tuple[int, str]] = []
-    with SENTENCES_OUT.open("w", encoding="utf-8", newline="") as f:
-        writer = csv.writer(f)
-        writer.writerow(["sentence_id", "sentence_text"])
-        for i, sent in enumerate(doc.sents):
-            text = sent.text.strip()
-            if not text:
-                continue
-            sentences.append((i, text))
-            writer.writerow([i, text])
-    return sentences
-
-
-def write_tokens(doc: spacy.tokens.Doc) -> None:
+    buf: list[str] = []
+    buf_len = 0
+    for para in text.split("\n\n"):
+        buf.append(para)
+        buf_len += len(para) + 2
+        if buf_len >= size:
+            yield "\n\n".join(buf)
+            buf = []
+            buf_len = 0
+    if buf:
+        yield "\n\n".join(buf)
+
+
+# Attribute columns exported in bulk per doc (order matters below).
+TOKEN_ATTRS = [ORTH, LEMMA, POS, TAG, DEP, HEAD, IS_ALPHA, IS_STOP]
+
+
+def _decode_strings(vocab: spacy.vocab.Vocab, hashes: np.ndarray) -> np.ndarray:
     """
-    Writes one row per token with linguistic annotations to CSV.
+    Maps a column of spaCy string-store hashes to strings, resolving each
+    distinct hash only once.
     """
-    with TOKENS_OUT.open("w", encoding="utf-8", newline="") as f:
-        writer = csv.writer(f)
-        writer.writerow(
-            [
-                "sentence_id",
-                "token_i",
-                "token",
-                "lemma",
-                "pos",
-                "tag",
-                "dep",
-                "head",
-                "is_alpha",
-                "is_stop",
-            ]
-        )
+    uniq, inv = np.unique(hashes, return_inverse=True)
+    lookup = np.array([vocab.strings[int(h)] for h in uniq], dtype=object)
+    return lookup[inv]
+
+
+def doc_token_frame(doc: spacy.tokens.Doc, sent_id_of_local: np.ndarray) -> pd.DataFrame:
+    """
+    Builds the token table for one doc from a single Doc.to_array export
+    instead of per-token attribute accesses.
+
+    sent_id_of_local maps the doc's sentence positions to the global
+    sentence ids assigned by write_outputs, with -1 for whitespace-only
+    sentences that were not written; their tokens are dropped so every
+    token row references a sentence that exists in sentences.csv.
+    """
+    arr = doc.to_array(TOKEN_ATTRS)
+    idx = np.arange(arr.shape[0])
+
+    sent_starts = np.fromiter((s.start for s in doc.sents), dtype=np.int64)
+    sent_of_tok = np.searchsorted(sent_starts, idx, side="right") - 1
+    sids = sent_id_of_local[sent_of_tok]
+
+    orth = _decode_strings(doc.vocab, arr[:, 0])
+    # HEAD is stored as an unsigned offset; reinterpret as signed.
+    head_idx = idx + arr[:, 5].astype(np.int64)
+    head = orth[head_idx]
+
+    keep = sids >= 0
+    if not keep.all():
+        idx = idx[keep]
+        arr = arr[keep]
+        sent_of_tok = sent_of_tok[keep]
+        sids = sids[keep]
+        orth = orth[keep]
+        head = head[keep]
+
+    lemma = _decode_strings(doc.vocab, arr[:, 1])
+
+    return pd.DataFrame(
+        {
+            "sentence_id": sids,
+            "token_i": idx - sent_starts[sent_of_tok],
+            "token": orth,
+            "lemma": lemma,
+            # precomputed so downstream scripts never lowercase again
+            "lemma_lower": pd.Series(lemma).str.lower().to_numpy(),
+            "pos": _decode_strings(doc.vocab, arr[:, 2]),
+            "tag": _decode_strings(doc.vocab, arr[:, 3]),
+            "dep": _decode_strings(doc.vocab, arr[:, 4]),
+            "head": head,
+            "is_alpha": arr[:, 6].astype(np.int8),
+            "is_stop": arr[:, 7].astype(np.int8),
+        }
+    )
+
+
+def write_outputs(docs: list[spacy.tokens.Doc]) -> None:
+    """
+    Writes sentences.csv and tokens.csv in a single pass over the docs.
+    Token rows come from bulk Doc.to_array exports rather than per-token
+    Python attribute lookups. Sentence ids run densely from 0 across
+    docs and are shared by both files; whitespace-only parser sentences
+    get no id (and no token rows), so downstream loaders can index
+    sentences by position.
+    """
+    frames: list[pd.DataFrame] = []
+    sent_rows: list[tuple[int, str]] = []
+    sent_id = 0
+    # 1 MiB write buffer: far fewer syscalls than the default 8KB
+    with SENTENCES_OUT.open("w", encoding="utf-8", newline="", buffering=1 << 20) as sf:
+        sent_writer = csv.writer(sf)
+        sent_writer.writerow(["sentence_id", "sentence_text"])
+
+        for doc in docs:
+            sent_ids: list[int] = []
+            for sent in doc.sents:
+                text = sent.text.strip()
+                if text:
+                    sent_writer.writerow([sent_id, text])
+                    sent_rows.append((sent_id, text))
+                    sent_ids.append(sent_id)
+                    sent_id += 1
+                else:
+                    sent_ids.append(-1)
+
+            if len(doc):
+                frames.append(doc_token_frame(doc, np.asarray(sent_ids, dtype=np.int64)))
+
+    tokens = pd.concat(frames, ignore_index=True)
+    with TOKENS_OUT.open("w", encoding="utf-8", newline="", buffering=1 << 20) as tf:
+        tokens.to_csv(tf, index=False)
+    # Columnar mirrors: downstream scripts prefer these over re-parsing CSV.
+    tokens.to_parquet(TOKENS_PARQUET, compression="zstd")
+
+    # Content-POS subset for the lexicon matcher (full fidelity stays in
+    # tokens.csv / tokens.parquet for other consumers).
+    content = tokens[tokens["pos"].isin(CONTENT_POS)]
+    with TOKENS_CONTENT_OUT.open("w", encoding="utf-8", newline="", buffering=1 << 20) as cf:
+        content.to_csv(cf, index=False)
+    content.to_parquet(TOKENS_CONTENT_PARQUET, compression="zstd")
+    sentences = pd.DataFrame(sent_rows, columns=["sentence_id", "sentence_text"])
+    sentences["sentence_id"] = sentences["sentence_id"].astype("int32")
+    sentences.to_parquet(SENTENCES_PARQUET, compression="zstd")
+
 
-        for sent_id, sent in enumerate(doc.sents):
-            for token_i, tok in enumerate(sent):
-                writer.writerow(
-                    [
-                        sent_id,
-                        token_i,
-                        tok.text,
-                        tok.lemma_,
-                        tok.pos_,
-                        tok.tag_,
-                        tok.dep_,
-                        tok.head.text,
-                        int(tok.is_alpha),
-                        int(tok.is_stop),
-                    ]
-                )
-
-
-def sanity_checks(doc: spacy.tokens.Doc) -> None:
+def sanity_checks(docs: list[spacy.tokens.Doc]) -> None:
     """
     Print a few lemma sanity checks so you can confirm the pipeline is working.
     """
     targets = {"took", "ate", "fell", "threw", "killed", "drowned", "burnt", "burned"}
     hits = []
-    for tok in doc:
-        if tok.text.lower() in targets and tok.pos_ == "VERB":
-            hits.append((tok.text, tok.lemma_, tok.pos_))
-            if len(hits) >= 15:
-                break
+    for doc in docs:
+        for tok in doc:
+            if tok.text.lower() in targets and tok.pos_ == "VERB":
+                hits.append((tok.text, tok.lemma_, tok.pos_))
+        if len(hits) >= 15:
+            hits = hits[:15]
+            break
 
     print("\nSanity check: sample verb surface forms → lemmas")
     if not hits:
@@ -143,18 +234,20 @@ def main() -> int:
 
     nlp = load_spacy_model()
 
-    # Slight speed/memory help: we only need these components
-    # (keep parser because we want sentence boundaries + dependencies)
-    # If your text is huge, we could use nlp.pipe; Grimm is small enough.
-    doc = nlp(text)
+    # Feed paragraph-aligned chunks through nlp.pipe so the pipeline
+    # batches work across all cores instead of parsing one giant doc.
+    docs = list(nlp.pipe(iter_chunks(text), batch_size=64, n_process=os.cpu_count()))
 
     # Write outputs
-    _ = write_sentences(doc)
-    write_tokens(doc)
+    write_outputs(docs)
 
     print(f"\nWrote: {SENTENCES_OUT}")
+    print(f"Wrote: {SENTENCES_PARQUET}")
     print(f"Wrote: {TOKENS_OUT}")
-    sanity_checks(doc)
+    print(f"Wrote: {TOKENS_PARQUET}")
+    print(f"Wrote: {TOKENS_CONTENT_OUT}")
+    print(f"Wrote: {TOKENS_CONTENT_PARQUET}")
+    sanity_checks(docs)
     print("\nDone.")
     return 0
 
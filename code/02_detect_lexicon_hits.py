@@ -31,10 +31,27 @@ from collections import defaultdict
 from pathlib import Path
 from typing import Dict, Set, Optional
 
+import numpy as np
+import pandas as pd
+
+try:
+    from numba import njit
+except ImportError:  # pure-numpy fallback below
+    njit = None
+
+try:
+    import orjson
+except ImportError:  # stdlib json fallback below
+    orjson = None
+
 
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
 TOKENS_IN = PROJECT_ROOT / "results" / "tokens.csv"
+TOKENS_PARQUET_IN = PROJECT_ROOT / "results" / "tokens.parquet"
+TOKENS_CONTENT_IN = PROJECT_ROOT / "results" / "tokens_content.csv"
+TOKENS_CONTENT_PARQUET_IN = PROJECT_ROOT / "results" / "tokens_content.parquet"
 SENTENCES_IN = PROJECT_ROOT / "results" / "sentences.csv"
+SENTENCES_PARQUET_IN = PROJECT_ROOT / "results" / "sentences.parquet"
 
 TRANS_LEX = PROJECT_ROOT / "lexicons" / "transgression.json"
 PUN_LEX = PROJECT_ROOT / "lexicons" / "punishment.json"
@@ -64,7 +81,10 @@ def load_lexicon(path: Path) -> Dict[str, Set[str]]:
     }
     Any missing category is treated as empty.
     """
-    data = json.loads(path.read_text(encoding="utf-8"))
+    if orjson is not None:
+        data = orjson.loads(path.read_bytes())
+    else:
+        data = json.loads(path.read_text(encoding="utf-8"))
     if not isinstance(data, dict):
         raise ValueError(f"Lexicon file {path} must contain a JSON object.")
 
@@ -75,29 +95,163 @@ def load_lexicon(path: Path) -> Dict[str, Set[str]]:
             vals = []
         if not isinstance(vals, list) or not all(isinstance(v, str) for v in vals):
             raise ValueError(f"Lexicon file {path} key '{cat}' must be a list of strings.")
-        out[cat] = {v.strip().lower() for v in vals if v and v.strip()}
+        out[cat] = frozenset(v.strip().lower() for v in vals if v and v.strip())
 
     return out
 
 
-def load_sentences(path: Path) -> dict[int, str]:
-    sentences: dict[int, str] = {}
+def load_sentences(path: Path) -> list[str]:
+    """
+    Returns sentence texts indexed by sentence_id. 01_preprocess.py
+    writes ids densely from 0, which is validated here so callers can
+    use plain list indexing instead of dict lookups plus a sort.
+    """
+    if SENTENCES_PARQUET_IN.exists():
+        tbl = pd.read_parquet(SENTENCES_PARQUET_IN)
+        sids = tbl["sentence_id"].to_numpy()
+        if not (sids == np.arange(len(sids))).all():
+            raise ValueError(f"{SENTENCES_PARQUET_IN} has non-contiguous sentence_id values.")
+        return tbl["sentence_text"].tolist()
+
     with path.open("r", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            sid = int(row["sentence_id"])
-            sentences[sid] = row["sentence_text"]
-    return sentences
+        reader = csv.reader(f)
+        header = next(reader)
+        i_sid = header.index("sentence_id")
+        i_text = header.index("sentence_text")
+        # one C-level pass; avoids per-row list growth and the int
+        # compare inside the loop
+        rows = list(reader)
+
+    sids = np.fromiter((int(r[i_sid]) for r in rows), dtype=np.int64, count=len(rows))
+    if not (sids == np.arange(len(rows))).all():
+        raise ValueError(f"{path} has non-contiguous sentence_id values.")
+    return [r[i_text] for r in rows]
+
+
+# Bit per lexicon in the combined lookup table.
+TRANS_BIT = 1
+PUN_BIT = 2
+REWARD_BIT = 4
+
+# hit_type / hit_labels looked up directly by flag bitmask (index 0 is
+# never used: rows without a hit are filtered out first).
+_HIT_TYPE = np.array(
+    ["", "transgression", "punishment", "both", "reward", "both", "both", "triple"],
+    dtype=object,
+)
+_HIT_LABELS = np.array(
+    [
+        "",
+        "transgression",
+        "punishment",
+        "transgression|punishment",
+        "reward",
+        "transgression|reward",
+        "punishment|reward",
+        "transgression|punishment|reward",
+    ],
+    dtype=object,
+)
+
+
+def build_combined_lookup(
+    trans: Dict[str, Set[str]],
+    pun: Dict[str, Set[str]],
+    reward: Optional[Dict[str, Set[str]]],
+) -> Dict[tuple[str, str], int]:
+    """
+    Maps (lex_cat, lemma) to a 3-bit mask (1=transgression, 2=punishment,
+    4=reward) so membership in all three lexicons is a single hashed
+    lookup per token instead of one probe per lexicon.
+    """
+    combined: Dict[tuple[str, str], int] = defaultdict(int)
+    for bit, lex in ((TRANS_BIT, trans), (PUN_BIT, pun), (REWARD_BIT, reward)):
+        if lex is None:
+            continue
+        for cat, words in lex.items():
+            for word in words:
+                combined[(cat, word)] |= bit
+    return dict(combined)
 
 
-def lexicon_has(lex: Dict[str, Set[str]], lex_cat: str, lemma: str) -> bool:
-    return lemma in lex.get(lex_cat, set())
+def _scan_counts_py(sids: np.ndarray, flags: np.ndarray, n_sents: int):
+    """
+    Per-sentence hit counts from the hit rows' flag bits. Compiled with
+    numba when available; the numpy fallback uses three bincounts.
+    The loop scatters into per-sentence slots, so it stays serial.
+    """
+    trans = np.zeros(n_sents, np.int64)
+    pun = np.zeros(n_sents, np.int64)
+    reward = np.zeros(n_sents, np.int64)
+    for i in range(sids.size):
+        f = flags[i]
+        s = sids[i]
+        if f & TRANS_BIT:
+            trans[s] += 1
+        if f & PUN_BIT:
+            pun[s] += 1
+        if f & REWARD_BIT:
+            reward[s] += 1
+    return trans, pun, reward
+
+
+if njit is not None:
+    _scan_counts = njit(cache=True)(_scan_counts_py)
+else:
+    def _scan_counts(sids: np.ndarray, flags: np.ndarray, n_sents: int):
+        return (
+            np.bincount(sids[(flags & TRANS_BIT) > 0], minlength=n_sents),
+            np.bincount(sids[(flags & PUN_BIT) > 0], minlength=n_sents),
+            np.bincount(sids[(flags & REWARD_BIT) > 0], minlength=n_sents),
+        )
+
+
+def load_tokens() -> pd.DataFrame:
+    """
+    Prefers the content-POS-only token files (only POS this script ever
+    matches on), then the columnar parquet mirrors, then tokens.csv.
+    The returned lemma column is already lowercased, via the lemma_lower
+    column precomputed by 01_preprocess.py when present.
+    """
+    if TOKENS_CONTENT_PARQUET_IN.exists():
+        path, is_parquet = TOKENS_CONTENT_PARQUET_IN, True
+    elif TOKENS_CONTENT_IN.exists():
+        path, is_parquet = TOKENS_CONTENT_IN, False
+    elif TOKENS_PARQUET_IN.exists():
+        path, is_parquet = TOKENS_PARQUET_IN, True
+    else:
+        path, is_parquet = TOKENS_IN, False
+
+    if is_parquet:
+        import pyarrow.parquet as pq
+
+        names = pq.ParquetFile(path).schema_arrow.names
+        lemma_col = "lemma_lower" if "lemma_lower" in names else "lemma"
+        df = pd.read_parquet(path, columns=["sentence_id", "token", lemma_col, "pos"])
+    else:
+        with path.open(encoding="utf-8") as f:
+            header = f.readline().rstrip("\r\n").split(",")
+        lemma_col = "lemma_lower" if "lemma_lower" in header else "lemma"
+        df = pd.read_csv(
+            path,
+            usecols=["sentence_id", "token", lemma_col, "pos"],
+            dtype={"sentence_id": "int64", "token": "string", lemma_col: "string", "pos": "string"},
+            engine="c",
+            na_filter=False,
+        )
+
+    if lemma_col == "lemma_lower":
+        df = df.rename(columns={"lemma_lower": "lemma"})
+    else:
+        # older tokens files: lowercase once here
+        df["lemma"] = df["lemma"].str.lower()
+    return df
 
 
 def main() -> None:
-    if not TOKENS_IN.exists():
+    if not TOKENS_IN.exists() and not TOKENS_PARQUET_IN.exists():
         raise FileNotFoundError(f"Missing {TOKENS_IN}. Run code/01_preprocess.py first.")
-    if not SENTENCES_IN.exists():
+    if not SENTENCES_IN.exists() and not SENTENCES_PARQUET_IN.exists():
         raise FileNotFoundError(f"Missing {SENTENCES_IN}. Run code/01_preprocess.py first.")
     if not TRANS_LEX.exists() or not PUN_LEX.exists():
         raise FileNotFoundError("Missing lexicon JSON files in lexicons/. Create transgression.json and punishment.json first.")
@@ -112,142 +266,85 @@ def main() -> None:
 
     sentences = load_sentences(SENTENCES_IN)
 
-    # Accumulators per sentence (store lemmas as lists for readability)
-    trans_hits = defaultdict(list)   # sid -> list[str]
-    pun_hits = defaultdict(list)     # sid -> list[str]
-    reward_hits = defaultdict(list)  # sid -> list[str] (optional)
-
-    token_hits_rows = []
-
-    with TOKENS_IN.open("r", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            sid = int(row["sentence_id"])
-            token = row["token"]
-            lemma = (row["lemma"] or "").lower().strip()
-            pos = (row["pos"] or "").strip()
-
-            if not lemma:
-                continue
-
-            lex_cat = POS_TO_LEXCAT.get(pos)
-            if not lex_cat:
-                continue  # ignore other POS (DET, ADP, PRON, etc.)
-
-            in_trans = lexicon_has(trans, lex_cat, lemma)
-            in_pun = lexicon_has(pun, lex_cat, lemma)
-            in_reward = False
-            if use_reward and reward is not None:
-                in_reward = lexicon_has(reward, lex_cat, lemma)
-
-            if not (in_trans or in_pun or in_reward):
-                continue
-
-            # sentence accumulators
-            if in_trans:
-                trans_hits[sid].append(lemma)
-            if in_pun:
-                pun_hits[sid].append(lemma)
-            if in_reward:
-                reward_hits[sid].append(lemma)
-
-            # hit_type label
-            hit_labels = []
-            if in_trans:
-                hit_labels.append("transgression")
-            if in_pun:
-                hit_labels.append("punishment")
-            if in_reward:
-                hit_labels.append("reward")
-
-            if len(hit_labels) == 1:
-                hit_type = hit_labels[0]
-            elif len(hit_labels) == 2:
-                hit_type = "both"
-            else:
-                hit_type = "triple"
-
-            token_hits_rows.append(
-                {
-                    "sentence_id": sid,
-                    "token": token,
-                    "lemma": lemma,
-                    "pos": pos,
-                    "lex_cat": lex_cat,
-                    "hit_type": hit_type,
-                    "hit_labels": "|".join(hit_labels),
-                }
-            )
-
-    # Write token-level hits
-    with TOKEN_HITS_OUT.open("w", encoding="utf-8", newline="") as f:
-        fieldnames = ["sentence_id", "token", "lemma", "pos", "lex_cat", "hit_type", "hit_labels"]
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(token_hits_rows)
-
-    # Write sentence-level table
-    with SENT_HITS_OUT.open("w", encoding="utf-8", newline="") as f:
-        fieldnames = [
-            "sentence_id",
-            "sentence_text",
-            "transgression_hit_count",
-            "punishment_hit_count",
-        ]
-
-        if use_reward:
-            fieldnames.append("reward_hit_count")
-
-        fieldnames += [
-            "transgression_lemmas",
-            "punishment_lemmas",
-        ]
-
-        if use_reward:
-            fieldnames.append("reward_lemmas")
-
-        fieldnames += [
-            "any_hit",
-        ]
-
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-
-        for sid in sorted(sentences.keys()):
-            t = trans_hits.get(sid, [])
-            p = pun_hits.get(sid, [])
-            r = reward_hits.get(sid, []) if use_reward else []
-
-            row_out = {
-                "sentence_id": sid,
-                "sentence_text": sentences[sid],
-                "transgression_hit_count": len(t),
-                "punishment_hit_count": len(p),
-                "transgression_lemmas": " ".join(t),
-                "punishment_lemmas": " ".join(p),
-                "any_hit": int(bool(t) or bool(p) or (bool(r) if use_reward else False)),
-            }
-
-            if use_reward:
-                row_out["reward_hit_count"] = len(r)
-                row_out["reward_lemmas"] = " ".join(r)
-
-            writer.writerow(row_out)
+    # Vectorized token scan instead of a per-row csv.DictReader loop.
+    df = load_tokens()
+    df["lemma"] = df["lemma"].str.strip()
+    df["pos"] = df["pos"].str.strip()
+    df["lex_cat"] = df["pos"].map(POS_TO_LEXCAT)
+
+    # ignore empty lemmas and other POS (DET, ADP, PRON, etc.)
+    df = df[df["lex_cat"].notna() & (df["lemma"] != "")]
+
+    # One combined (lex_cat, lemma) -> bitmask probe per *distinct* key:
+    # factorize the key column to int codes, resolve each unique key once,
+    # then broadcast the flags with an integer take.
+    combined = build_combined_lookup(trans, pun, reward)
+    keys = pd.MultiIndex.from_arrays([df["lex_cat"], df["lemma"]])
+    codes, uniques = pd.factorize(keys)
+    flag_by_code = np.array([combined.get(k, 0) for k in uniques], dtype=np.int8)
+    flags = flag_by_code[codes]
+
+    in_trans = (flags & TRANS_BIT) > 0
+    in_pun = (flags & PUN_BIT) > 0
+    in_reward = (flags & REWARD_BIT) > 0
+
+    # Keep one hit table and three aligned boolean arrays; both output
+    # files are derived from it without a second scan or row copies.
+    any_mask = flags > 0
+    hits = df[any_mask]
+    hit_flags = flags[any_mask]
+    hit_trans = in_trans[any_mask]
+    hit_pun = in_pun[any_mask]
+    hit_reward = in_reward[any_mask]
+
+    # Write token-level hits; labels come straight from the bitmask LUTs
+    token_out = hits[["sentence_id", "token", "lemma", "pos", "lex_cat"]].copy()
+    token_out["hit_type"] = _HIT_TYPE[hit_flags]
+    token_out["hit_labels"] = _HIT_LABELS[hit_flags]
+    token_out.to_csv(TOKEN_HITS_OUT, index=False)
+
+    # Sentence-level aggregation: counts via bincount over contiguous int
+    # arrays, joined lemma lists via groupby on the (small) hit subset.
+    n_sids = len(sentences)
+    sid_arr = hits["sentence_id"].to_numpy()
+
+    def joined_lemmas(mask: np.ndarray) -> pd.Series:
+        return hits[mask].groupby("sentence_id")["lemma"].agg(" ".join)
+
+    trans_counts, pun_counts, reward_counts = _scan_counts(sid_arr, hit_flags, n_sids)
+    trans_lemmas = joined_lemmas(hit_trans)
+    pun_lemmas = joined_lemmas(hit_pun)
+    if use_reward:
+        reward_lemmas = joined_lemmas(hit_reward)
+
+    out = pd.DataFrame({"sentence_id": np.arange(n_sids)})
+    out["sentence_text"] = sentences
+    out["transgression_hit_count"] = trans_counts
+    out["punishment_hit_count"] = pun_counts
+    if use_reward:
+        out["reward_hit_count"] = reward_counts
+    out["transgression_lemmas"] = out["sentence_id"].map(trans_lemmas).fillna("")
+    out["punishment_lemmas"] = out["sentence_id"].map(pun_lemmas).fillna("")
+    if use_reward:
+        out["reward_lemmas"] = out["sentence_id"].map(reward_lemmas).fillna("")
+
+    any_hit = (out["transgression_hit_count"] > 0) | (out["punishment_hit_count"] > 0)
+    if use_reward:
+        any_hit |= out["reward_hit_count"] > 0
+    out["any_hit"] = any_hit.astype(int)
+
+    out.to_csv(SENT_HITS_OUT, index=False)
 
     print(f"Wrote: {TOKEN_HITS_OUT}")
     print(f"Wrote: {SENT_HITS_OUT}")
 
     # quick summary
     total_sents = len(sentences)
-    hit_sents = sum(
-        1
-        for sid in sentences
-        if trans_hits.get(sid) or pun_hits.get(sid) or (reward_hits.get(sid) if use_reward else False)
-    )
+    hit_sents = int(out["any_hit"].sum())
     print(f"Sentences total: {total_sents}")
     print(f"Sentences with any hit: {hit_sents} ({hit_sents/total_sents:.1%})")
     if use_reward:
-        rew_sents = sum(1 for sid in sentences if reward_hits.get(sid))
+        rew_sents = int((out["reward_hit_count"] > 0).sum())
         print(f"Sentences with reward hit: {rew_sents} ({rew_sents/total_sents:.1%})")
 
 
@@ -20,7 +20,6 @@ Notes:
 
 from __future__ import annotations
 
-import csv
 from collections import Counter
 from pathlib import Path
 
@@ -28,6 +27,17 @@ import matplotlib
 matplotlib.use("Agg")
 
 import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+
+# Figure defaults set once: autolayout replaces per-figure tight_layout
+# calls and savefig.dpi the per-call dpi argument.
+plt.rcParams.update({"figure.autolayout": True, "savefig.dpi": 200, "font.size": 9})
+
+try:
+    from numba import njit
+except ImportError:  # pure-pandas fallback below
+    njit = None
 
 
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
@@ -36,6 +46,8 @@ TOKEN_HITS = PROJECT_ROOT / "results" / "token_hits.csv"
 
 RESULTS_DIR = PROJECT_ROOT / "results"
 FIG_DIR = RESULTS_DIR / "figures"
+# precomputed string prefix: savefig paths skip the PosixPath round trip
+FIG = str(FIG_DIR) + "/"
 SUMMARY_OUT = RESULTS_DIR / "analysis_summary.txt"
 
 
@@ -43,65 +55,150 @@ def ensure_dirs() -> None:
     FIG_DIR.mkdir(parents=True, exist_ok=True)
 
 
-def load_sentence_hits(path: Path) -> tuple[list[dict], bool]:
+def _csv_header(path: Path) -> list[str]:
+    with path.open(encoding="utf-8") as f:
+        return f.readline().rstrip("\r\n").split(",")
+
+
+def _read_csv_cached(path: Path, usecols: list[str], dtype: dict) -> pd.DataFrame:
+    """
+    Reads a CSV through a zstd parquet mirror: the mirror is written on
+    first parse and reused as long as it is newer than the CSV, so
+    re-running the analysis during plotting iteration skips re-parsing.
+    """
+    cache = path.with_suffix(".parquet")
+    if cache.exists() and cache.stat().st_mtime >= path.stat().st_mtime:
+        try:
+            return pd.read_parquet(cache, columns=usecols)
+        except ImportError:
+            pass  # no parquet engine: fall through to the CSV
+    df = pd.read_csv(path, usecols=usecols, dtype=dtype)
+    try:
+        df.to_parquet(cache, compression="zstd")
+    except ImportError:
+        pass  # no parquet engine: parse the CSV again next run
+    return df
+
+
+def load_sentence_hits(path: Path) -> tuple[pd.DataFrame, bool]:
     """
-    Returns (rows, has_reward_columns).
+    Returns (sentence table, has_reward_columns). Only the hit-count
+    columns are parsed, with narrow integer dtypes.
     """
-    rows = []
-    has_reward = False
-
-    with path.open("r", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        fieldnames = reader.fieldnames or []
-        has_reward = "reward_hit_count" in fieldnames
-
-        for r in reader:
-            r["sentence_id"] = int(r["sentence_id"])
-            r["transgression_hit_count"] = int(r["transgression_hit_count"])
-            r["punishment_hit_count"] = int(r["punishment_hit_count"])
-            if has_reward:
-                r["reward_hit_count"] = int(r.get("reward_hit_count", 0))
-            r["any_hit"] = int(r["any_hit"])
-            rows.append(r)
-
-    return rows, has_reward
-
-
-def load_token_hits(path: Path) -> list[dict]:
-    rows = []
-    with path.open("r", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for r in reader:
-            r["sentence_id"] = int(r["sentence_id"])
-            r["lemma"] = (r.get("lemma") or "").lower().strip()
-            r["hit_type"] = (r.get("hit_type") or "").lower().strip()
-            # hit_labels is optional, but nice if present
-            r["hit_labels"] = (r.get("hit_labels") or "").lower().strip()
-            rows.append(r)
-    return rows
+    has_reward = "reward_hit_count" in _csv_header(path)
+
+    usecols = ["sentence_id", "transgression_hit_count", "punishment_hit_count", "any_hit"]
+    dtype = {
+        "sentence_id": "int32",
+        "transgression_hit_count": "int16",
+        "punishment_hit_count": "int16",
+        "any_hit": "int8",
+    }
+    if has_reward:
+        usecols.append("reward_hit_count")
+        dtype["reward_hit_count"] = "int16"
+
+    df = _read_csv_cached(path, usecols, dtype)
+    return df, has_reward
+
+
+def load_token_hits(path: Path) -> pd.DataFrame:
+    # hit_labels is deliberately not read: nothing downstream uses it
+    df = _read_csv_cached(
+        path, usecols=["sentence_id", "lemma", "hit_type"], dtype={"sentence_id": "int32"}
+    )
+    df["lemma"] = df["lemma"].fillna("").str.lower().str.strip()
+    df["hit_type"] = df["hit_type"].fillna("").str.lower().str.strip()
+    return df
 
 
 def top_n(counter: Counter, n: int = 15) -> list[tuple[str, int]]:
     return counter.most_common(n)
 
 
+# Fixed category order shared by the tally kernel and its consumers.
+HIT_TYPES = ("transgression", "punishment", "reward", "both", "triple")
+
+if njit is not None:
+
+    @njit(cache=True)
+    def _tally(lemma_codes, ht_codes, n_lemmas):
+        out = np.zeros((len(HIT_TYPES), n_lemmas), np.int64)
+        for i in range(lemma_codes.size):
+            c = ht_codes[i]
+            if c >= 0:
+                out[c, lemma_codes[i]] += 1
+        return out
+
+
+def lemma_counters(tok_df: pd.DataFrame) -> dict[str, Counter]:
+    """
+    Per-hit_type lemma frequency Counters over the token table.
+
+    With numba installed, lemma and hit_type are factorized to int codes
+    and counted by a compiled kernel; otherwise a hashed groupby does the
+    same work. Either way, counts within a hit_type keep first-appearance
+    order so Counter.most_common tie-breaking is stable.
+    """
+    sub = tok_df[tok_df["lemma"] != ""]
+
+    if njit is None:
+        grouped = sub.groupby(["hit_type", "lemma"], sort=False).size()
+        out = {}
+        for ht in HIT_TYPES:
+            try:
+                out[ht] = Counter(grouped.loc[ht].to_dict())
+            except KeyError:
+                out[ht] = Counter()
+        return out
+
+    lemma_codes, lemma_uniques = pd.factorize(sub["lemma"])
+    ht_codes, ht_uniques = pd.factorize(sub["hit_type"])
+    remap = np.full(len(ht_uniques), -1, dtype=np.int8)
+    for i, ht in enumerate(ht_uniques):
+        if ht in HIT_TYPES:
+            remap[i] = HIT_TYPES.index(ht)
+    cat = remap[ht_codes]
+
+    counts = _tally(lemma_codes.astype(np.int64), cat, len(lemma_uniques))
+
+    # First-appearance order of (hit_type, lemma) pairs, as groupby
+    # (sort=False) would produce it.
+    pair = cat.astype(np.int64) * len(lemma_uniques) + lemma_codes
+    _, first = np.unique(pair[cat >= 0], return_index=True)
+    ordered = pair[cat >= 0][np.sort(first)]
+
+    out = {ht: Counter() for ht in HIT_TYPES}
+    for p in ordered:
+        c, l = divmod(int(p), len(lemma_uniques))
+        out[HIT_TYPES[c]][lemma_uniques[l]] = int(counts[c, l])
+    return out
+
+
 def write_summary(text: str) -> None:
     SUMMARY_OUT.write_text(text, encoding="utf-8")
 
 
-def bar_plot(items: list[tuple[str, int]], title: str, outpath: Path) -> None:
+def lemma_section(title: str, counter: Counter) -> str:
+    body = "\n".join(f"  {lemma:<12} {c}" for lemma, c in top_n(counter, 15))
+    return f"{title}\n{body}" if body else title
+
+
+def dist_section(title: str, dist: np.ndarray) -> str:
+    body = "\n".join(f"  {k:>2} -> {v}" for k, v in enumerate(dist) if v)
+    return f"{title}\n{body}" if body else title
+
+
+def bar_panel(ax, items: list[tuple[str, int]], title: str) -> None:
+    """
+    Draws one top-lemma bar chart onto an axes of a shared figure.
+    """
     if not items:
         return
-    labels = [k for k, _ in items]
-    values = [v for _, v in items]
-
-    plt.figure()
-    plt.bar(labels, values)
-    plt.title(title)
-    plt.xticks(rotation=45, ha="right")
-    plt.tight_layout()
-    plt.savefig(outpath, dpi=200)
-    plt.close()
+    labels, values = zip(*items)
+    ax.bar(labels, values)
+    ax.set_title(title)
+    plt.setp(ax.get_xticklabels(), rotation=45, ha="right")
 
 
 def main() -> None:
@@ -112,123 +209,82 @@ def main() -> None:
     if not TOKEN_HITS.exists():
         raise FileNotFoundError(f"Missing {TOKEN_HITS}. Run code/02_detect_lexicon_hits.py first.")
 
-    sent_rows, has_reward = load_sentence_hits(SENT_HITS)
-    token_rows = load_token_hits(TOKEN_HITS)
+    sent_df, has_reward = load_sentence_hits(SENT_HITS)
+    tok_df = load_token_hits(TOKEN_HITS)
 
-    total_sents = len(sent_rows)
-    any_hit = sum(r["any_hit"] for r in sent_rows)
-    trans_sents = sum(1 for r in sent_rows if r["transgression_hit_count"] > 0)
-    pun_sents = sum(1 for r in sent_rows if r["punishment_hit_count"] > 0)
-    both_sents = sum(
-        1 for r in sent_rows
-        if r["transgression_hit_count"] > 0 and r["punishment_hit_count"] > 0
-    )
+    # Pull the count columns out once as contiguous int arrays; every
+    # coverage statistic below is a boolean-mask reduction over them.
+    trans = sent_df["transgression_hit_count"].to_numpy()
+    pun = sent_df["punishment_hit_count"].to_numpy()
+    rew = sent_df["reward_hit_count"].to_numpy() if has_reward else None
+
+    total_sents = len(sent_df)
+    any_hit = int(sent_df["any_hit"].to_numpy().sum())
+    trans_sents = int((trans > 0).sum())
+    pun_sents = int((pun > 0).sum())
+    both_sents = int(((trans > 0) & (pun > 0)).sum())
 
     reward_sents = 0
     if has_reward:
-        reward_sents = sum(1 for r in sent_rows if r["reward_hit_count"] > 0)
-        triple_sents = sum(
-            1 for r in sent_rows
-            if r["transgression_hit_count"] > 0 and r["punishment_hit_count"] > 0 and r["reward_hit_count"] > 0
-        )
+        reward_sents = int((rew > 0).sum())
+        triple_sents = int(((trans > 0) & (pun > 0) & (rew > 0)).sum())
     else:
         triple_sents = 0
 
-    # Token-level frequency counts
-    trans_token_lemmas = Counter()
-    pun_token_lemmas = Counter()
-    reward_token_lemmas = Counter()
-    both_token_lemmas = Counter()      # for hit_type == "both"
-    triple_token_lemmas = Counter()    # for hit_type == "triple" (if present)
-
-    for r in token_rows:
-        lemma = r["lemma"]
-        hit_type = r["hit_type"]
-        if not lemma:
-            continue
-
-        if hit_type == "transgression":
-            trans_token_lemmas[lemma] += 1
-        elif hit_type == "punishment":
-            pun_token_lemmas[lemma] += 1
-        elif hit_type == "reward":
-            reward_token_lemmas[lemma] += 1
-        elif hit_type == "both":
-            both_token_lemmas[lemma] += 1
-        elif hit_type == "triple":
-            triple_token_lemmas[lemma] += 1
-
-    # Sentence-level distribution of counts
-    trans_count_dist = Counter(r["transgression_hit_count"] for r in sent_rows)
-    pun_count_dist = Counter(r["punishment_hit_count"] for r in sent_rows)
-    reward_count_dist = Counter(r["reward_hit_count"] for r in sent_rows) if has_reward else Counter()
-
-    # Summary text
-    lines = []
-    lines.append("Grimm lexicon pipeline — analysis summary\n")
-    lines.append(f"Total sentences: {total_sents}")
-    lines.append(f"Sentences with ANY lexicon hit: {any_hit} ({any_hit/total_sents:.1%})")
-    lines.append(f"Sentences with TRANSGRESSION hit: {trans_sents} ({trans_sents/total_sents:.1%})")
-    lines.append(f"Sentences with PUNISHMENT hit: {pun_sents} ({pun_sents/total_sents:.1%})")
-    lines.append(f"Sentences with BOTH transgression & punishment hits: {both_sents} ({both_sents/total_sents:.1%})")
-
+    # Token-level frequency counts, per hit_type (JIT-compiled kernel
+    # when numba is available; hashed groupby otherwise).
+    counters = lemma_counters(tok_df)
+    trans_token_lemmas = counters["transgression"]
+    pun_token_lemmas = counters["punishment"]
+    reward_token_lemmas = counters["reward"]
+    both_token_lemmas = counters["both"]
+    triple_token_lemmas = counters["triple"]
+
+    # Sentence-level distribution of counts: the counts are small
+    # non-negative ints, so a bincount per category replaces hashing and
+    # sorting (bin index == hit count).
+    trans_count_dist = np.bincount(trans, minlength=7)
+    pun_count_dist = np.bincount(pun, minlength=7)
+    reward_count_dist = np.bincount(rew, minlength=7) if has_reward else np.zeros(7, np.int64)
+
+    # Summary text: one block string per section, assembled with a
+    # single join instead of line-by-line appends.
+    sections = ["Grimm lexicon pipeline — analysis summary"]
+
+    coverage_lines = [
+        f"Total sentences: {total_sents}",
+        f"Sentences with ANY lexicon hit: {any_hit} ({any_hit/total_sents:.1%})",
+        f"Sentences with TRANSGRESSION hit: {trans_sents} ({trans_sents/total_sents:.1%})",
+        f"Sentences with PUNISHMENT hit: {pun_sents} ({pun_sents/total_sents:.1%})",
+        f"Sentences with BOTH transgression & punishment hits: {both_sents} ({both_sents/total_sents:.1%})",
+    ]
     if has_reward:
-        lines.append(f"Sentences with REWARD hit: {reward_sents} ({reward_sents/total_sents:.1%})")
-        lines.append(f"Sentences with TRIPLE (transgression+punishment+reward): {triple_sents} ({triple_sents/total_sents:.1%})")
-
-    lines.append("")
-
-    lines.append("Top transgression lemmas (token-level):")
-    for lemma, c in top_n(trans_token_lemmas, 15):
-        lines.append(f"  {lemma:<12} {c}")
-    lines.append("")
-
-    lines.append("Top punishment lemmas (token-level):")
-    for lemma, c in top_n(pun_token_lemmas, 15):
-        lines.append(f"  {lemma:<12} {c}")
-    lines.append("")
+        coverage_lines.append(f"Sentences with REWARD hit: {reward_sents} ({reward_sents/total_sents:.1%})")
+        coverage_lines.append(f"Sentences with TRIPLE (transgression+punishment+reward): {triple_sents} ({triple_sents/total_sents:.1%})")
+    sections.append("\n".join(coverage_lines))
 
+    sections.append(lemma_section("Top transgression lemmas (token-level):", trans_token_lemmas))
+    sections.append(lemma_section("Top punishment lemmas (token-level):", pun_token_lemmas))
     if has_reward:
-        lines.append("Top reward lemmas (token-level):")
-        for lemma, c in top_n(reward_token_lemmas, 15):
-            lines.append(f"  {lemma:<12} {c}")
-        lines.append("")
-
+        sections.append(lemma_section("Top reward lemmas (token-level):", reward_token_lemmas))
     if both_token_lemmas:
-        lines.append("Overlapping lemmas marked as BOTH (token-level):")
-        for lemma, c in top_n(both_token_lemmas, 15):
-            lines.append(f"  {lemma:<12} {c}")
-        lines.append("")
-
+        sections.append(lemma_section("Overlapping lemmas marked as BOTH (token-level):", both_token_lemmas))
     if triple_token_lemmas:
-        lines.append("Overlapping lemmas marked as TRIPLE (token-level):")
-        for lemma, c in top_n(triple_token_lemmas, 15):
-            lines.append(f"  {lemma:<12} {c}")
-        lines.append("")
-
-    lines.append("Distribution: transgression_hit_count per sentence (count -> #sentences)")
-    for k in sorted(trans_count_dist.keys()):
-        lines.append(f"  {k:>2} -> {trans_count_dist[k]}")
-    lines.append("")
-
-    lines.append("Distribution: punishment_hit_count per sentence (count -> #sentences)")
-    for k in sorted(pun_count_dist.keys()):
-        lines.append(f"  {k:>2} -> {pun_count_dist[k]}")
-    lines.append("")
+        sections.append(lemma_section("Overlapping lemmas marked as TRIPLE (token-level):", triple_token_lemmas))
 
+    sections.append(dist_section("Distribution: transgression_hit_count per sentence (count -> #sentences)", trans_count_dist))
+    sections.append(dist_section("Distribution: punishment_hit_count per sentence (count -> #sentences)", pun_count_dist))
     if has_reward:
-        lines.append("Distribution: reward_hit_count per sentence (count -> #sentences)")
-        for k in sorted(reward_count_dist.keys()):
-            lines.append(f"  {k:>2} -> {reward_count_dist[k]}")
-        lines.append("")
+        sections.append(dist_section("Distribution: reward_hit_count per sentence (count -> #sentences)", reward_count_dist))
 
-    summary_text = "\n".join(lines)
+    summary_text = "\n\n".join(sections) + "\n"
     print(summary_text)
     write_summary(summary_text)
     print(f"Wrote: {SUMMARY_OUT}")
 
     # --- Plots ---
     # 1) Sentence coverage bar chart
+    fig, ax = plt.subplots()
     coverage_labels = ["Any hit", "Transgression", "Punishment", "Both"]
     coverage_values = [any_hit, trans_sents, pun_sents, both_sents]
 
@@ -236,96 +292,58 @@ def main() -> None:
         coverage_labels += ["Reward", "Triple"]
         coverage_values += [reward_sents, triple_sents]
 
-    plt.figure()
-    plt.bar(coverage_labels, coverage_values)
-    plt.title("Sentence coverage: lexicon hits")
-    plt.tight_layout()
-    plt.savefig(FIG_DIR / "coverage_sentences.png", dpi=200)
-    plt.close()
-
-    # 2) Top transgression lemmas
-    bar_plot(
-        top_n(trans_token_lemmas, 15),
-        "Top transgression lemmas (token hits)",
-        FIG_DIR / "top_transgression_lemmas.png",
-    )
-
-    # 3) Top punishment lemmas
-    bar_plot(
-        top_n(pun_token_lemmas, 15),
-        "Top punishment lemmas (token hits)",
-        FIG_DIR / "top_punishment_lemmas.png",
-    )
-
-    # 4) Top reward lemmas (if present)
+    ax.bar(coverage_labels, coverage_values)
+    ax.set_title("Sentence coverage: lexicon hits")
+    fig.savefig(FIG + "coverage_sentences.png", pil_kwargs={"compress_level": 1})
+    plt.close(fig)
+
+    # 2) Top lemmas per hit type: all panels share one figure, so PNG
+    # encoding and text layout are paid once instead of per chart.
+    panels = [
+        (top_n(trans_token_lemmas, 15), "Top transgression lemmas"),
+        (top_n(pun_token_lemmas, 15), "Top punishment lemmas"),
+    ]
     if has_reward:
-        bar_plot(
-            top_n(reward_token_lemmas, 15),
-            "Top reward lemmas (token hits)",
-            FIG_DIR / "top_reward_lemmas.png",
-        )
-
-    # 5) BOTH / TRIPLE overlap plots
+        panels.append((top_n(reward_token_lemmas, 15), "Top reward lemmas"))
     if both_token_lemmas:
-        bar_plot(
-            top_n(both_token_lemmas, 15),
-            "Overlapping lemmas (hit_type = BOTH)",
-            FIG_DIR / "overlap_both_lemmas.png",
-        )
-
+        panels.append((top_n(both_token_lemmas, 15), "Overlap (hit_type = BOTH)"))
     if triple_token_lemmas:
-        bar_plot(
-            top_n(triple_token_lemmas, 15),
-            "Overlapping lemmas (hit_type = TRIPLE)",
-            FIG_DIR / "overlap_triple_lemmas.png",
-        )
-
-    # 6) Hit-count distributions
+        panels.append((top_n(triple_token_lemmas, 15), "Overlap (hit_type = TRIPLE)"))
+
+    ncols = 3
+    nrows = (len(panels) + ncols - 1) // ncols
+    fig, axes = plt.subplots(nrows, ncols, figsize=(6 * ncols, 4.5 * nrows))
+    axes = np.atleast_1d(axes).ravel()
+    for panel_ax, (items, title) in zip(axes, panels):
+        bar_panel(panel_ax, items, title)
+    for panel_ax in axes[len(panels):]:
+        panel_ax.axis("off")
+    fig.suptitle("Top lemmas per hit type (token hits)")
+    fig.savefig(FIG + "top_lemmas.png", pil_kwargs={"compress_level": 1})
+    plt.close(fig)
+
+    # 3) Hit-count distributions, one shared-y panel per category
     max_k = 0
-    if trans_count_dist:
-        max_k = max(max_k, max(trans_count_dist.keys()))
-    if pun_count_dist:
-        max_k = max(max_k, max(pun_count_dist.keys()))
-    if has_reward and reward_count_dist:
-        max_k = max(max_k, max(reward_count_dist.keys()))
+    for dist in (trans_count_dist, pun_count_dist, reward_count_dist):
+        nonzero = np.flatnonzero(dist)
+        if nonzero.size:
+            max_k = max(max_k, int(nonzero[-1]))
     max_k = min(max_k, 6)
 
-    # transgression
-    trans_x = list(range(0, max_k + 1))
-    trans_y = [trans_count_dist.get(k, 0) for k in trans_x]
-    plt.figure()
-    plt.bar([str(k) for k in trans_x], trans_y)
-    plt.title("Transgression hits per sentence (0–6)")
-    plt.xlabel("hit count")
-    plt.ylabel("# sentences")
-    plt.tight_layout()
-    plt.savefig(FIG_DIR / "dist_transgression_hits_per_sentence.png", dpi=200)
-    plt.close()
-
-    # punishment
-    pun_x = list(range(0, max_k + 1))
-    pun_y = [pun_count_dist.get(k, 0) for k in pun_x]
-    plt.figure()
-    plt.bar([str(k) for k in pun_x], pun_y)
-    plt.title("Punishment hits per sentence (0–6)")
-    plt.xlabel("hit count")
-    plt.ylabel("# sentences")
-    plt.tight_layout()
-    plt.savefig(FIG_DIR / "dist_punishment_hits_per_sentence.png", dpi=200)
-    plt.close()
-
-    # reward
+    dists = [(trans_count_dist, "Transgression"), (pun_count_dist, "Punishment")]
     if has_reward:
-        rew_x = list(range(0, max_k + 1))
-        rew_y = [reward_count_dist.get(k, 0) for k in rew_x]
-        plt.figure()
-        plt.bar([str(k) for k in rew_x], rew_y)
-        plt.title("Reward hits per sentence (0–6)")
-        plt.xlabel("hit count")
-        plt.ylabel("# sentences")
-        plt.tight_layout()
-        plt.savefig(FIG_DIR / "dist_reward_hits_per_sentence.png", dpi=200)
-        plt.close()
+        dists.append((reward_count_dist, "Reward"))
+
+    fig, axes = plt.subplots(1, len(dists), sharey=True, figsize=(4 * len(dists), 3.5))
+    xs = [str(k) for k in range(max_k + 1)]
+    for panel_ax, (dist, title) in zip(axes, dists):
+        panel_ax.bar(xs, dist[: max_k + 1])
+        panel_ax.set_title(title)
+        panel_ax.set_xlabel("hit count")
+    axes[0].set_ylabel("# sentences")
+    fig.suptitle("Hits per sentence (0–6)")
+    fig.savefig(FIG + "dist_hits_per_sentence.png", pil_kwargs={"compress_level": 1})
+    plt.close(fig)
 
     print(f"Wrote figures to: {FIG_DIR}")
 
@@ -23,6 +23,15 @@ ROOT = Path(__file__).resolve().parents[1]
 SENT_HITS = ROOT / "results" / "sentence_hits.csv"
 
 
+# category -> predicate over (transgression_hit_count, punishment_hit_count)
+CATEGORY_PREDICATES = {
+    "transgression": lambda t, p: t > 0 and p == 0,
+    "punishment": lambda t, p: p > 0 and t == 0,
+    "both": lambda t, p: t > 0 and p > 0,
+    "none": lambda t, p: t == 0 and p == 0,
+}
+
+
 def main() -> int:
     if len(sys.argv) < 2:
         print("Usage: python 04_show_sentences_by_category.py <category> [n]")
@@ -34,32 +43,39 @@ def main() -> int:
     if not SENT_HITS.exists():
         raise FileNotFoundError("results/sentence_hits.csv not found. Run 02_detect_lexicon_hits.py first.")
 
-    rows = []
-    with SENT_HITS.open(encoding="utf-8") as f:
-        for r in csv.DictReader(f):
-            r["transgression_hit_count"] = int(r["transgression_hit_count"])
-            r["punishment_hit_count"] = int(r["punishment_hit_count"])
-            rows.append(r)
-
-    if category == "transgression":
-        subset = [r for r in rows if r["transgression_hit_count"] > 0 and r["punishment_hit_count"] == 0]
-    elif category == "punishment":
-        subset = [r for r in rows if r["punishment_hit_count"] > 0 and r["transgression_hit_count"] == 0]
-    elif category == "both":
-        subset = [r for r in rows if r["punishment_hit_count"] > 0 and r["transgression_hit_count"] > 0]
-    elif category == "none":
-        subset = [r for r in rows if r["punishment_hit_count"] == 0 and r["transgression_hit_count"] == 0]
-    else:
+    predicate = CATEGORY_PREDICATES.get(category)
+    if predicate is None:
         print("Category must be: transgression | punishment | both | none")
         return 2
 
-    random.shuffle(subset)
-    sample = subset[: min(n, len(subset))]
-
-    print(f"\nCategory '{category}' — showing {len(sample)} of {len(subset)} sentences:\n")
-    for r in sample:
-        print(f"[{r['sentence_id']}]")
-        print(r["sentence_text"])
+    # Single streaming pass with reservoir sampling (Algorithm R): keeps
+    # at most n rows in memory instead of materializing the whole file.
+    reservoir: list[tuple[str, str]] = []
+    total = 0
+    with SENT_HITS.open(encoding="utf-8", newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        i_sid = header.index("sentence_id")
+        i_text = header.index("sentence_text")
+        i_t = header.index("transgression_hit_count")
+        i_p = header.index("punishment_hit_count")
+        for row in reader:
+            if not predicate(int(row[i_t]), int(row[i_p])):
+                continue
+            if total < n:
+                reservoir.append((row[i_sid], row[i_text]))
+            else:
+                j = random.randint(0, total)
+                if j < n:
+                    reservoir[j] = (row[i_sid], row[i_text])
+            total += 1
+
+    random.shuffle(reservoir)
+
+    print(f"\nCategory '{category}' — showing {len(reservoir)} of {total} sentences:\n")
+    for sid, text in reservoir:
+        print(f"[{sid}]")
+        print(text)
         print()
 
     return 0
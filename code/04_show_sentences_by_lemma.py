@@ -15,33 +15,98 @@ Usage examples:
 from __future__ import annotations
 
 import csv
+import pickle
 import random
 import sys
 from pathlib import Path
 
+import numpy as np
+import pandas as pd
+
+try:
+    from pyarrow import csv as pacsv
+except ImportError:  # pure-Python csv fallback below
+    pacsv = None
+
 
 ROOT = Path(__file__).resolve().parents[1]
 TOKENS = ROOT / "results" / "tokens.csv"
+TOKENS_PARQUET = ROOT / "results" / "tokens.parquet"
 SENTS = ROOT / "results" / "sentences.csv"
+INDEX_CACHE = ROOT / "results" / ".verb_lemma_index.pkl"
 
 
 def load_sentences() -> dict[int, str]:
+    if pacsv is not None:
+        # multithreaded C++ parser; the Python loop below only runs
+        # when pyarrow is not installed
+        tbl = pacsv.read_csv(SENTS)
+        return dict(
+            zip(tbl.column("sentence_id").to_pylist(), tbl.column("sentence_text").to_pylist())
+        )
+
     out = {}
-    with SENTS.open("r", encoding="utf-8") as f:
-        for r in csv.DictReader(f):
-            out[int(r["sentence_id"])] = r["sentence_text"]
+    with SENTS.open("r", encoding="utf-8", newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        i_sid = header.index("sentence_id")
+        i_text = header.index("sentence_text")
+        for row in reader:
+            out[int(row[i_sid])] = row[i_text]
     return out
 
 
-def collect_sentence_ids_for_lemma(target_lemma: str) -> set[int]:
-    sids = set()
-    with TOKENS.open("r", encoding="utf-8") as f:
-        for r in csv.DictReader(f):
-            if r["pos"] != "VERB":
-                continue
-            if (r["lemma"] or "").lower() == target_lemma:
-                sids.add(int(r["sentence_id"]))
-    return sids
+def build_verb_lemma_index() -> dict[str, np.ndarray]:
+    """
+    Maps each VERB lemma to its unique sentence_ids. Built once with a
+    pandas groupby and pickle-cached keyed on the tokens file's mtime,
+    so repeated queries for different lemmas skip the full token scan.
+    """
+    src = TOKENS_PARQUET if TOKENS_PARQUET.exists() else TOKENS
+    mtime = src.stat().st_mtime
+    if INDEX_CACHE.exists():
+        try:
+            cached = pickle.loads(INDEX_CACHE.read_bytes())
+            if cached.get("mtime") == mtime:
+                return cached["index"]
+        except Exception:
+            pass  # stale or unreadable cache: rebuild below
+
+    if src is TOKENS_PARQUET:
+        import pyarrow.parquet as pq
+
+        names = pq.ParquetFile(src).schema_arrow.names
+        lemma_col = "lemma_lower" if "lemma_lower" in names else "lemma"
+        df = pd.read_parquet(src, columns=["sentence_id", lemma_col, "pos"])
+    else:
+        with TOKENS.open(encoding="utf-8") as f:
+            header = f.readline().rstrip("\r\n").split(",")
+        lemma_col = "lemma_lower" if "lemma_lower" in header else "lemma"
+        df = pd.read_csv(
+            src,
+            usecols=["sentence_id", lemma_col, "pos"],
+            dtype={"sentence_id": "int32"},
+            engine="c",
+            na_filter=False,
+        )
+
+    verbs = df[df["pos"].eq("VERB")]
+    lemmas = verbs[lemma_col]
+    if lemma_col == "lemma":
+        # older tokens files: lowercase once here
+        lemmas = lemmas.str.lower()
+
+    index = {
+        lemma: sids.unique().astype(np.int32)
+        for lemma, sids in verbs.groupby(lemmas, sort=False)["sentence_id"]
+    }
+    INDEX_CACHE.write_bytes(pickle.dumps({"mtime": mtime, "index": index}))
+    return index
+
+
+def collect_sentence_ids_for_lemma(target_lemma: str) -> np.ndarray:
+    index = build_verb_lemma_index()
+    return index.get(target_lemma, np.empty(0, dtype=np.int32))
 
 
 def main() -> int:
@@ -56,14 +121,15 @@ def main() -> int:
         raise FileNotFoundError("Missing results/tokens.csv or results/sentences.csv. Run 01_preprocess.py first.")
 
     sentences = load_sentences()
-    sids = sorted(collect_sentence_ids_for_lemma(lemma))
+    # no sort: sampling does not care about id order
+    sids = collect_sentence_ids_for_lemma(lemma)
 
-    if not sids:
+    if sids.size == 0:
         print(f"No sentences found containing VERB lemma: {lemma}")
         return 0
 
-    random.shuffle(sids)
-    sample = sids[: min(n, len(sids))]
+    # O(n) selection instead of shuffling the whole id list
+    sample = random.sample(list(sids), k=min(n, len(sids)))
 
     print(f"\nFound {len(sids)} sentences containing VERB lemma '{lemma}'. Showing {len(sample)} random examples:\n")
     for sid in sample: